@@ -1,153 +1,393 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import csv
 import glob
-import random
-from collections import defaultdict
+import hashlib
+import os
+import pickle
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+# One generator for all random choices (classroom allocation), seeded for reproducible runs
+RNG = np.random.default_rng(0)
 
 st.set_page_config(page_title="IIM Ranchi - OR Timetable Portal", page_icon="🏫", layout="centered")
 
 # --- 1. Automated Data Processing ---
+CACHE_DIR = ".cache"
+# Part of each cached roster's file name: bump whenever header sniffing or roster cleaning changes
+PARSER_VERSION = 2
+FACULTY_PATTERN = re.compile(r'(?m)^(?=.*Faculty Name)[^,\r\n]*,([^,\r\n]*)')
+HEADER_PATTERN = re.compile(r'(?m)^(?=.*Student ID)(?=.*Student Name).*$')
+
+def _write_atomically(path, write):
+    """Write through a private temp file and rename it into place, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _ensure_parquet(csv_path):
+    """Cleaned roster table for a course CSV, served from its Parquet cache when that is fresh."""
+    parquet_path = os.path.join(CACHE_DIR, os.path.basename(csv_path).replace('.csv', f'.v{PARSER_VERSION}.parquet'))
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        try:
+            return pq.read_table(parquet_path)
+        except Exception:
+            pass  # Unreadable cache: rebuild it from the CSV
+    
+    # The faculty/subject preamble and column header sit in the first few lines; never read the whole roster
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        head = f.read(8192)
+    
+    faculty, subject, header_idx, header_line = "Unknown", "Unknown", -1, ""
+    
+    header = HEADER_PATTERN.search(head)
+    if header and head.count('\n', 0, header.start()) < 10:
+        header_idx = head.count('\n', 0, header.start())
+        header_line = header.group(0).rstrip('\r')
+    preamble = head[:header.start()] if header_idx != -1 else ''.join(head.splitlines(True)[:10])
+    
+    # Second field of a "Faculty Name" line; the last non-empty one wins
+    for match in FACULTY_PATTERN.finditer(preamble):
+        if match.group(1).strip():
+            faculty = match.group(1).strip()
+    
+    if header_idx != -1:
+        for line in preamble.splitlines():
+            if "Faculty Name" not in line and "Group Mail ID" not in line:
+                potential_subj = line.split(',')[0].strip()
+                if potential_subj and potential_subj not in ["SN", "Serial No."]:
+                    subject = potential_subj
+    
+    if subject == "Unknown": subject = os.path.basename(csv_path).split('.')[0]
+    
+    # Courses without a readable roster still keep their timetable slot
+    df = pd.DataFrame({'Student ID': pd.Series(dtype=str), 'Student Name': pd.Series(dtype=str)})
+    parsed = True
+    try:
+        columns = {}
+        if header_idx != -1:
+            columns = {name.strip(): name for name in next(csv.reader([header_line]))}
+        if 'Student ID' in columns and 'Student Name' in columns:
+            # Multithreaded Arrow reader, only the two roster columns, typed as strings up front
+            wanted = [columns['Student ID'], columns['Student Name']]
+            try:
+                raw = pa_csv.read_csv(
+                    csv_path,
+                    read_options=pa_csv.ReadOptions(skip_rows=header_idx),
+                    convert_options=pa_csv.ConvertOptions(
+                        include_columns=wanted,
+                        column_types={name: pa.string() for name in wanted},
+                        strings_can_be_null=True,
+                    ),
+                ).to_pandas()
+            except pa.ArrowInvalid:
+                # Ragged rows (e.g. a missing trailing Email) stop the Arrow reader; pandas pads them with NaN
+                raw = pd.read_csv(csv_path, skiprows=header_idx)
+            raw.columns = raw.columns.str.strip()
+            df = raw[['Student ID', 'Student Name']].dropna(subset=['Student ID']).copy()
+            df['Student ID'] = df['Student ID'].astype(str).str.strip().str.upper()
+            df = df[df['Student ID'] != 'NAN']
+            df['Student Name'] = df['Student Name'].astype(str).str.strip()
+    except Exception:
+        parsed = False
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'__faculty__': faculty.encode('utf-8'),
+        b'__subject__': subject.encode('utf-8'),
+    })
+    # Only cache a successful parse, so a failed read is retried on the next run instead of sticking
+    if parsed:
+        try:
+            _write_atomically(parquet_path, lambda tmp_path: pq.write_table(table, tmp_path))
+        except OSError:
+            pass
+    return table
+
+def _parse_one(file):
+    try:
+        table = _ensure_parquet(file)
+    except Exception:
+        return None
+    
+    metadata = table.schema.metadata
+    faculty = metadata[b'__faculty__'].decode('utf-8')
+    subject = metadata[b'__subject__'].decode('utf-8')
+    if table.num_rows == 0:
+        return subject, faculty, None
+    
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    df['Subject'] = subject
+    return subject, faculty, df
+
+def _fingerprint():
+    """(path, mtime, size) of every course CSV; changes whenever the inputs do."""
+    return tuple(sorted((p, os.path.getmtime(p), os.path.getsize(p)) for p in glob.glob("*.csv")))
+
 @st.cache_data
-def process_data():
-    all_files = glob.glob("*.csv")
-    student_records = []
+def process_data(fingerprint):
+    # The fingerprint is the cache key: unchanged inputs hit Streamlit's cache instead of re-reading files
+    all_files = [path for path, _, _ in fingerprint]
+    frames = []
     course_info = {}
     
-    for file in all_files:
-        try:
-            with open(file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            faculty, subject, header_idx = "Unknown", "Unknown", -1
-            
-            for i, line in enumerate(lines[:10]):
-                if "Faculty Name" in line:
-                    parts = line.split(',')
-                    if len(parts) > 1 and parts[1].strip():
-                        faculty = parts[1].strip()
-                if "Student ID" in line and "Student Name" in line:
-                    header_idx = i
-                    break
-            
-            for i in range(max(0, header_idx)):
-                if "Faculty Name" not in lines[i] and "Group Mail ID" not in lines[i]:
-                    potential_subj = lines[i].split(',')[0].strip()
-                    if potential_subj and potential_subj not in ["SN", "Serial No."]:
-                        subject = potential_subj
-            
-            if subject == "Unknown": subject = file.split('.')[0]
-            course_info[subject] = faculty
-            
-            if header_idx != -1:
-                df = pd.read_csv(file, skiprows=header_idx)
-                df.columns = df.columns.str.strip()
-                if 'Student ID' in df.columns and 'Student Name' in df.columns:
-                    for _, row in df.iterrows():
-                        s_id = str(row['Student ID']).strip().upper()
-                        if s_id != 'NAN':
-                            student_records.append({
-                                'Student ID': s_id,
-                                'Student Name': str(row['Student Name']).strip(),
-                                'Subject': subject
-                            })
-        except Exception:
-            pass 
+    # Load course files concurrently; the Arrow and pandas parsers release the GIL
+    results = []
+    if all_files:
+        with ThreadPoolExecutor(max_workers=min(8, len(all_files))) as ex:
+            results = list(ex.map(_parse_one, all_files))
+    
+    for result in results:
+        if result is None:
+            continue
+        subject, faculty, df = result
+        course_info[subject] = faculty
+        if df is not None:
+            frames.append(df)
             
-    return pd.DataFrame(student_records), course_info
+    if not frames:
+        return pd.DataFrame(columns=['Student ID', 'Student Name', 'Subject']), course_info
+    student_df = pd.concat(frames, ignore_index=True)
+    # Few distinct values repeat across many rows: store them as integer codes for cheap grouping and matching
+    student_df['Subject'] = student_df['Subject'].astype('category')
+    student_df['Student ID'] = student_df['Student ID'].astype('category')
+    return student_df, course_info
+
+@st.cache_data
+def build_index(student_df):
+    """Lower-cased login columns plus exact roll-number -> row positions lookup."""
+    login_index = student_df.assign(
+        _idl=student_df['Student ID'].str.lower(),
+        _nml=student_df['Student Name'].str.lower(),
+    )
+    by_id = login_index.groupby('_idl', sort=False).indices
+    return login_index, by_id
 
 # --- 2. Upgraded OR Constraint Solver ---
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+SLOTS = ['09:00 AM - 10:30 AM', '11:00 AM - 12:30 PM', '02:00 PM - 03:30 PM', '04:00 PM - 05:30 PM']
+DAY_IDX = {day: i for i, day in enumerate(DAYS)}
+SLOT_IDX = {slot: i for i, slot in enumerate(SLOTS)}
+
+# Constraint 2: STRICT Maximum 4 classes a day
+MAX_DAILY_CLASSES = 4
+# Constraint 3: NO LEAVE DAYS & MIN 2 CLASSES
+# Indexed by how many classes a student already has that day: heavily reward days with
+# 0 (prevents "leave" days) or 1 class (reaches the "Min 2" rule), and penalise 2 and 3
+# so nobody reaches the max of 4 too early.
+PENALTY = np.array([-1000, -500, 100, 500, 500], dtype=np.int32)
+# Classes held on a day, looked up from that day's 4-bit slot mask
+POPCOUNT = np.array([bin(i).count('1') for i in range(16)], dtype=np.int8)
+# Cap on backtracking placements so infeasible enrollments still return promptly
+MAX_SEARCH_NODES = 20_000
+# Part of the timetable cache key: bump whenever the solver can produce a different schedule
+SOLVER_VERSION = 3
+
+def _timetable_cache_path(student_df, course_info):
+    """On-disk location of the solved timetable for these exact inputs."""
+    key = hashlib.blake2b(
+        f'solver-v{SOLVER_VERSION}'.encode('utf-8')
+        + pd.util.hash_pandas_object(student_df).values.tobytes()
+        + repr(sorted(course_info.items())).encode('utf-8'),
+        digest_size=16,
+    ).hexdigest()
+    return os.path.join(CACHE_DIR, f'tt_{key}.pkl')
+
+def _solve_cp_sat(E, n_days, n_slots):
+    """Exact CP-SAT timetable for a course x student enrollment matrix; None if no schedule is found."""
+    n_courses = E.shape[0]
+    model = cp_model.CpModel()
+    # x[c][d][s] is true when course c is held in slot s on day d
+    x = [[[model.NewBoolVar(f'x{c}_{d}_{s}') for s in range(n_slots)] for d in range(n_days)]
+         for c in range(n_courses)]
+    for c in range(n_courses):
+        model.AddExactlyOne(x[c][d][s] for d in range(n_days) for s in range(n_slots))
+    
+    # Students with identical course lists share constraints; weight their objective terms instead
+    profiles, counts = np.unique(E.T > 0, axis=0, return_counts=True)
+    objective = []
+    for profile, count in zip(profiles, counts):
+        courses = np.flatnonzero(profile)
+        if len(courses) == 0:
+            continue
+        for d in range(n_days):
+            # Constraint 1: STRICT Clash-Free
+            if len(courses) > 1:
+                for s in range(n_slots):
+                    model.AddAtMostOne(x[c][d][s] for c in courses)
+            # Constraint 2: STRICT Maximum 4 classes a day
+            classes_today = sum(x[c][d][s] for c in courses for s in range(n_slots))
+            model.Add(classes_today <= MAX_DAILY_CLASSES)
+            # Constraint 3: NO LEAVE DAYS & MIN 2 CLASSES, as distance outside 2-3 classes a day
+            shortfall = model.NewIntVar(0, 2, '')
+            excess = model.NewIntVar(0, 1, '')
+            model.Add(shortfall >= 2 - classes_today)
+            model.Add(excess >= classes_today - 3)
+            objective.append(int(count) * (shortfall + excess))
+    model.Minimize(sum(objective))
+    
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = 8
+    solver.parameters.max_time_in_seconds = 5
+    if solver.Solve(model) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return {c: (d, s) for c in range(n_courses) for d in range(n_days) for s in range(n_slots)
+            if solver.Value(x[c][d][s])}
+
+def _score_times(members, day_mask, blocked_row):
+    """Per-day placement penalty and (day, slot) feasibility grid for one course's students."""
+    # Score all (day, slot) times at once from the enrolled students' day masks
+    day_bits = day_mask[members]
+    num_classes = POPCOUNT[day_bits]
+    day_pen = PENALTY[num_classes].sum(axis=0)
+    occupied = np.bitwise_or.reduce(day_bits, axis=0)
+    # Constraint 1: STRICT Clash-Free
+    # Constraint 2: STRICT Maximum 4 classes a day
+    feasible = ((occupied[:, None] >> np.arange(len(SLOTS), dtype=np.uint8)) & 1) == 0
+    feasible &= ~(num_classes >= MAX_DAILY_CLASSES).any(axis=0)[:, None]
+    # Only times no placed neighbour occupies are in the course's domain
+    feasible &= (blocked_row == 0).reshape(len(DAYS), len(SLOTS))
+    return day_pen, feasible
+
 @st.cache_data
 def generate_timetable(student_df, course_info):
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    slots = ['09:00 AM - 10:30 AM', '11:00 AM - 12:30 PM', '02:00 PM - 03:30 PM', '04:00 PM - 05:30 PM']
+    # Reuse a schedule solved by a previous process for the same enrollments
+    cache_path = _timetable_cache_path(student_df, course_info)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception:
+            pass  # Truncated or stale pickle: solve again and overwrite it
     
-    # Map courses to the students enrolled
-    course_students = defaultdict(set)
-    for _, row in student_df.iterrows():
-        course_students[row['Subject']].add(row['Student ID'])
+    # Students become integer columns of a dense course x student enrollment matrix
+    student_codes, unique_students = pd.factorize(student_df['Student ID'])
+    n_students = len(unique_students)
+    
+    # Map courses to the row positions of the students enrolled
+    course_rows = student_df.groupby('Subject', sort=False, observed=True).indices
         
     all_subjects = list(course_info.keys())
     
-    # Heuristic Solver: Try up to 100 times to find the perfect clash-free schedule
-    for attempt in range(100):
-        timetable = []
-        student_schedule = {s: defaultdict(list) for s in student_df['Student ID'].unique()}
-        success = True
+    enrolled = {}
+    for subj in all_subjects:
+        enrolled[subj] = np.zeros(n_students, dtype=bool)
+        enrolled[subj][student_codes[course_rows.get(subj, [])]] = True
+    
+    masks = [enrolled[subj] for subj in all_subjects]
+    n_courses = len(all_subjects)
+    n_times = len(DAYS) * len(SLOTS)
+    
+    # Conflict graph: two courses clash when they share at least one student
+    E = np.array(masks, dtype=np.int32).reshape(n_courses, n_students)
+    conflict = (E @ E.T) > 0
+    np.fill_diagonal(conflict, False)
+    degree = conflict.sum(axis=1)
+    size = E.sum(axis=1)
+    # Enrolled student indices per course, resolved once instead of re-scanning boolean rows at every node
+    members = [np.flatnonzero(mask) for mask in masks]
+    
+    # Bit s of day_mask[student, d] is set when that student is busy in slot s on day d
+    day_mask = np.zeros((n_students, len(DAYS)), dtype=np.uint8)
+    # blocked[c, t] counts placed neighbours of course c sitting in time t = d * len(slots) + s
+    blocked = np.zeros((n_courses, n_times), dtype=np.int32)
+    unplaced = np.ones(n_courses, dtype=bool)
+    # Classes placed on each day across all students, to break penalty ties towards lighter days
+    day_totals = np.zeros(len(DAYS), dtype=np.int64)
+    assignment = {}
+    best_partial = {}
+    nodes = 0
+    
+    # Backtracking Solver: DSATUR-ordered, forward-checking search over the conflict graph
+    def place():
+        nonlocal best_partial, nodes
+        if len(assignment) == n_courses:
+            return True
         
-        # Shuffle subjects to explore different scheduling paths
-        random.shuffle(all_subjects) 
+        # Most constrained first: fewest times left, then most conflicts, then most students
+        saturation = (blocked > 0).sum(axis=1)
+        i = max(np.flatnonzero(unplaced), key=lambda c: (saturation[c], degree[c], size[c]))
+        m = members[i]
+        day_pen, feasible = _score_times(m, day_mask, blocked[i])
         
-        for subj in all_subjects:
-            enrolled_students = course_students[subj]
-            placed = False
-            
-            available_times = [(d, s) for d in days for s in slots]
-            random.shuffle(available_times)
-            
-            best_time = None
-            best_penalty = float('inf')
-            
-            for day, slot in available_times:
-                clash = False
-                daily_limit_reached = False
-                penalty = 0
-                
-                for student in enrolled_students:
-                    # Constraint 1: STRICT Clash-Free
-                    if slot in student_schedule[student][day]:
-                        clash = True
-                        break
-                    
-                    # Constraint 2: STRICT Maximum 4 classes a day
-                    num_classes_today = len(student_schedule[student][day])
-                    if num_classes_today >= 4:
-                        daily_limit_reached = True
-                        break
-                        
-                    # Constraint 3: NO LEAVE DAYS & MIN 2 CLASSES
-                    # We heavily reward placing a class on a day where the student currently has 0 or 1 class.
-                    if num_classes_today == 0:
-                        penalty -= 1000  # Massive priority to prevent "leave" days (0 classes)
-                    elif num_classes_today == 1:
-                        penalty -= 500   # High priority to reach the "Min 2" rule
-                    elif num_classes_today == 2:
-                        penalty += 100   # Slight penalty because they already hit the minimum
-                    else:
-                        penalty += 500   # High penalty for 3 classes to prevent reaching the max 4 too early
-                        
-                if not clash and not daily_limit_reached:
-                    if penalty < best_penalty:
-                        best_penalty = penalty
-                        best_time = (day, slot)
-                        
-            if best_time:
-                day, slot = best_time
-                timetable.append({
-                    'Subject': subj,
-                    'Faculty Name': course_info.get(subj, "Unknown"),
-                    'Day': day,
-                    'Time Slot': slot,
-                    'Room': f'CR-{random.randint(1, 8)}'
-                })
-                # Update trackers
-                for student in enrolled_students:
-                    student_schedule[student][day].append(slot)
-                placed = True
-            
-            if not placed:
-                success = False
+        # Best-first: least-penalised times, ties going to the day with the lightest overall load
+        times = np.flatnonzero(feasible)
+        times = times[np.lexsort((day_totals[times // len(SLOTS)], day_pen[times // len(SLOTS)]))]
+        unplaced[i] = False
+        for t in times:
+            d, s = divmod(int(t), len(SLOTS))
+            nodes += 1
+            if nodes > MAX_SEARCH_NODES:
                 break
-                
-        if success:
-            return pd.DataFrame(timetable)
-            
-    return pd.DataFrame(timetable)
+            bit = np.uint8(1 << s)
+            day_mask[m, d] |= bit
+            blocked[conflict[i], t] += 1
+            day_totals[d] += len(m)
+            assignment[i] = (d, s)
+            # Record before forward checking, so the last placement ahead of a wipe-out still counts
+            if len(assignment) > len(best_partial):
+                best_partial = dict(assignment)
+            # Forward checking: only unplaced neighbours of this course lost a time, so only they can be wiped out
+            if not (blocked[conflict[i] & unplaced] > 0).all(axis=1).any() and place():
+                return True
+            del assignment[i]
+            day_totals[d] -= len(m)
+            blocked[conflict[i], t] -= 1
+            day_mask[m, d] &= ~bit
+        unplaced[i] = True
+        return False
+    
+    placements = assignment
+    if not place():
+        # Backtracking failed or ran out of budget: the exact CP-SAT model (when OR-Tools is installed)
+        # either finds a full schedule or we keep the deepest partial one
+        rescued = _solve_cp_sat(E, len(DAYS), len(SLOTS)) if cp_model is not None else None
+        placements = rescued if rescued is not None else best_partial
+    timetable = []
+    rooms = RNG.integers(1, 9, size=len(placements))
+    for room, c in zip(rooms, sorted(placements)):
+        d, s = placements[c]
+        timetable.append({
+            'Subject': all_subjects[c],
+            'Faculty Name': course_info.get(all_subjects[c], "Unknown"),
+            'Day': DAYS[d],
+            'Time Slot': SLOTS[s],
+            'Room': f'CR-{room}'
+        })
+    master_schedule = pd.DataFrame(timetable)
+    
+    # Cache partial schedules too, so an infeasible enrollment does not pay for the CP-SAT rescue again
+    def dump(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(master_schedule, f, protocol=5)
+    try:
+        _write_atomically(cache_path, dump)
+    except OSError:
+        pass
+    return master_schedule
 
 # --- Initialize System ---
 with st.spinner('Running Operations Research Model...'):
-    student_df, course_info = process_data()
+    student_df, course_info = process_data(_fingerprint())
     if not student_df.empty:
         master_schedule = generate_timetable(student_df, course_info)
+        login_index, by_id = build_index(student_df)
 
 # --- 3. UI and Login System ---
 st.title("📚 OR Assignment: Timetable Portal")
@@ -166,10 +406,13 @@ else:
 
     if submit_button:
         if student_name and student_id:
-            user_data = student_df[
-                (student_df['Student ID'].str.contains(student_id, case=False, na=False)) & 
-                (student_df['Student Name'].str.contains(student_name, case=False, na=False))
-            ]
+            needle_id, needle_nm = student_id.lower(), student_name.lower()
+            if needle_id in by_id:
+                # Exact roll number: only that student's rows need the name check
+                candidates = login_index.iloc[by_id[needle_id]]
+            else:
+                candidates = login_index[login_index['_idl'].str.contains(needle_id, regex=False, na=False)]
+            user_data = candidates[candidates['_nml'].str.contains(needle_nm, regex=False, na=False)]
             
             if not user_data.empty:
                 st.balloons()
@@ -181,23 +424,26 @@ else:
                 
                 st.subheader("🗓️ Your Weekly Schedule")
                 
-                # Pivot table to show empty slots explicitly
-                calendar_view = personal_schedule.pivot(index='Time Slot', columns='Day', values='Subject')
-                
-                # Force all 5 days to appear even if a mathematically unfillable gap exists
-                for d in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-                    if d not in calendar_view.columns:
-                        calendar_view[d] = "---"
-                        
-                calendar_view = calendar_view.fillna("---")
-                day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+                # Fill the fixed 4 x 5 week grid directly so every slot and day shows, empty ones as "---"
+                grid = np.full((len(SLOTS), len(DAYS)), "---", dtype=object)
+                grid[
+                    personal_schedule['Time Slot'].map(SLOT_IDX).to_numpy(),
+                    personal_schedule['Day'].map(DAY_IDX).to_numpy(),
+                ] = personal_schedule['Subject'].to_numpy()
+                calendar_view = pd.DataFrame(
+                    grid,
+                    index=pd.Index(SLOTS, name='Time Slot'),
+                    columns=pd.Index(DAYS, name='Day'),
+                )
                 
-                # Apply custom styling to highlight classes vs empty slots
-                def color_schedule(val):
-                    color = '#e6ffe6' if val != '---' else '#ffe6e6'
-                    return f'background-color: {color}'
+                # Apply custom styling to highlight classes vs empty slots, computed for the whole grid at once
+                cell_styles = pd.DataFrame(
+                    np.where(grid != "---", 'background-color: #e6ffe6', 'background-color: #ffe6e6'),
+                    index=calendar_view.index,
+                    columns=calendar_view.columns,
+                )
                 
-                st.dataframe(calendar_view[day_order].style.map(color_schedule), use_container_width=True)
+                st.dataframe(calendar_view.style.apply(lambda _: cell_styles, axis=None), use_container_width=True)
                 
                 # --- Advanced Constraint Verification Display ---
                 st.markdown("### 📊 Automated Constraint Verification")